@@ -17,20 +17,46 @@ format, JSON or YAML, as input by default) to STDOUT.
   by its xname (string). 'group' is replaced by 'groups' (array).
 
 External deps: optional PyYAML for YAML support. If PyYAML is not installed,
-the tool will still work for JSON input.
+the tool will still work for JSON input. Optional orjson is used for faster
+JSON parsing and serialization if installed; the standard library json module
+is used otherwise. Optional ijson is required for --streaming-json.
 """
 import sys
 import json
 import re
 import argparse
+import importlib.util
+from operator import itemgetter
 
 try:
-    import yaml  # optional
-    HAVE_YAML = True
+    import orjson  # optional
+    HAVE_ORJSON = True
 except Exception:
-    HAVE_YAML = False
+    HAVE_ORJSON = False
 
-BMC_FIELDS = ("bmc_mac", "bmc_ip", "bmc_fqdn", "bmc_xname")
+# PyYAML and ijson are optional and comparatively slow to import, which adds up
+# when the tool is run over many small files. Only check that they are
+# installed here; they are imported when first needed (see _import_yaml()).
+HAVE_YAML = importlib.util.find_spec("yaml") is not None
+HAVE_IJSON = importlib.util.find_spec("ijson") is not None
+
+# orjson turns integers outside the 64-bit range into floats without an error.
+# Any such integer has at least 19 digits, so input with a digit run that long
+# (anywhere, including inside strings) is left to the stdlib parser and then
+# written by the stdlib encoder. The two encoders spell some floats
+# differently (see _orjson_dumps()), so the same float can come out in either
+# form depending on unrelated content elsewhere in the document.
+_LONG_DIGITS_RE = re.compile(r"\d{19,}")
+_LONG_DIGITS_RE_B = re.compile(rb"\d{19,}")
+
+_intern = sys.intern
+
+ERR_TOP_LEVEL_NOT_MAPPING = "Top-level document must be a mapping/dict containing 'nodes'."
+ERR_NO_NODES_ARRAY = "Input must contain a top-level 'nodes' array."
+
+# Converted nodes are kept in memory up to this size in --streaming-json mode
+# before being spilled to disk.
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
 
 
 def parse_args():
@@ -38,7 +64,13 @@ def parse_args():
         prog="old2new.py",
         description=(
             "Convert old node inventory format (JSON or YAML) to the new format.\n"
-            "Reads from STDIN and writes to STDOUT."
+            "Reads from STDIN and writes to STDOUT.\n\n"
+            "If orjson is installed, it also writes JSON output for input it can\n"
+            "parse exactly and for --streaming-json. Float values are preserved\n"
+            "but may be spelled differently than by Python's json module (e.g.\n"
+            "1e-7 instead of 1e-07, 1.5e16 instead of 1.5e+16, 0.00001 instead of\n"
+            "1e-05), and which spelling is used can depend on other content in\n"
+            "the document."
         ),
         epilog=(
             "Examples:\n"
@@ -50,7 +82,11 @@ def parse_args():
             "  # Force output YAML regardless of input\n"
             "  python3 old2new.py -o yaml < nodes.json > nodes-new.yaml\n\n"
             "  # Force the input parser (rarely needed; defaults to auto)\n"
-            "  python3 old2new.py -i yaml < nodes.yaml > nodes-new.yaml\n"
+            "  python3 old2new.py -i yaml < nodes.yaml > nodes-new.yaml\n\n"
+            "  # Emit compact JSON for machine consumption\n"
+            "  python3 old2new.py -o json --compact < nodes.yaml > nodes-new.json\n\n"
+            "  # Convert a very large JSON inventory without loading it all at once\n"
+            "  python3 old2new.py --streaming-json < nodes.json > nodes-new.json\n"
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -68,49 +104,114 @@ def parse_args():
         default="match",
         help="Output format (default: match input format)."
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Emit JSON without indentation or extra whitespace (JSON output only; "
+             "rejected if the output is YAML)."
+    )
+    parser.add_argument(
+        "--streaming-json",
+        dest="streaming_json",
+        action="store_true",
+        help="Parse JSON input incrementally to bound memory use on very large "
+             "inputs (JSON input and output only; requires ijson)."
+    )
     args = parser.parse_args()
 
     return args
 
 
-def read_input(fmt_hint):
-    """Return ('json'|'yaml', python_obj)."""
-    raw = sys.stdin.read()
+def _import_yaml(missing_msg):
+    """Import PyYAML and return (yaml, loader, dumper).
 
+    Exits with missing_msg if PyYAML is not installed or fails to import.
+    """
+    if HAVE_YAML:
+        try:
+            import yaml
+        except Exception:
+            pass
+        else:
+            # Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+            return yaml, loader, dumper
+    sys.stderr.write(missing_msg)
+    sys.exit(2)
+
+
+def _loads_json(raw):
+    """Parse a JSON document from str or bytes. Return (python_obj, by_orjson).
+
+    orjson is used when installed and it gives the same result as the stdlib
+    json module; otherwise (64-bit overflowing integers, or NaN, Infinity and
+    out-of-range floats, which orjson rejects) the stdlib parser is used.
+    by_orjson tells whether orjson parsed the document, in which case orjson
+    can also write it back without changing any value.
+    """
+    if HAVE_ORJSON:
+        long_digits = _LONG_DIGITS_RE_B if isinstance(raw, bytes) else _LONG_DIGITS_RE
+        if not long_digits.search(raw):
+            try:
+                return orjson.loads(raw), True
+            except orjson.JSONDecodeError:
+                pass
+    return json.loads(raw), False
+
+
+def read_input(fmt_hint):
+    """Return ('json'|'yaml', python_obj, by_orjson)."""
     if fmt_hint == "json":
         try:
-            return "json", json.loads(raw)
+            if HAVE_ORJSON:
+                return ("json",) + _loads_json(sys.stdin.buffer.read())
+            return "json", json.load(sys.stdin), False
         except Exception as e:
             sys.stderr.write(f"Failed to parse input as JSON: {e}\n")
             sys.exit(2)
     elif fmt_hint == "yaml":
-        if not HAVE_YAML:
-            sys.stderr.write("YAML parsing requested but PyYAML is not installed.\n")
-            sys.exit(2)
+        yaml, loader, _ = _import_yaml("YAML parsing requested but PyYAML is not installed.\n")
         try:
-            return "yaml", yaml.safe_load(raw)
+            return "yaml", yaml.load(sys.stdin, Loader=loader), False
         except Exception as e:
             sys.stderr.write(f"Failed to parse input as YAML: {e}\n")
             sys.exit(2)
     else:
-        # auto: try JSON first, then YAML
+        # auto: sniff the first non-whitespace character. JSON documents
+        # accepted here start with '{' or '['; anything else goes to YAML.
+        raw = sys.stdin.read()
+        first = next((c for c in raw if not c.isspace()), "")
+        if first in ("{", "["):
+            try:
+                return ("json",) + _loads_json(raw)
+            except Exception:
+                # Could still be YAML flow style; let the YAML parser decide
+                pass
+        yaml, loader, _ = _import_yaml(
+            "Input does not appear to be JSON and PyYAML is not installed.\n"
+            "Please install PyYAML (pip install pyyaml) or provide JSON input.\n"
+        )
         try:
-            return "json", json.loads(raw)
-        except Exception:
-            pass
-        if not HAVE_YAML:
-            sys.stderr.write(
-                "Input does not appear to be JSON and PyYAML is not installed.\n"
-                "Please install PyYAML (pip install pyyaml) or provide JSON input.\n"
-            )
-            sys.exit(2)
-        try:
-            return "yaml", yaml.safe_load(raw)
+            return "yaml", yaml.load(raw, Loader=loader), False
         except Exception as e:
             sys.stderr.write(f"Failed to parse input as YAML: {e}\n")
             sys.exit(2)
 
 
+def _strip_node_suffix(node_xname):
+    """Trim everything from the first 'n<digit>' onward from a node xname.
+
+    Example: x1000c0s0b0n0 -> x1000c0s0b0
+    """
+    i = node_xname.find("n")
+    while i != -1:
+        if node_xname[i + 1:i + 2].isdecimal():
+            return node_xname[:i]
+        i = node_xname.find("n", i + 1)
+    return node_xname
+
+
 def _derive_bmc_xname(node_xname, bmc_fqdn, bmc_xname):
     """Best-effort derivation of the BMC xname.
     Priority:
@@ -121,8 +222,7 @@ def _derive_bmc_xname(node_xname, bmc_fqdn, bmc_xname):
     if bmc_xname:
         return bmc_xname
     if node_xname:
-        # Example: x1000c0s0b0n0 -> x1000c0s0b0
-        return re.sub(r"n\d+.*$", "", node_xname)
+        return _strip_node_suffix(node_xname)
     if bmc_fqdn:
         return bmc_fqdn.split(".", 1)[0]
     return None
@@ -145,85 +245,181 @@ def normalize_groups_inplace(node: dict) -> None:
             groups.append(g)
         elif isinstance(g, list):
             groups.extend([str(x) for x in g if x])
-        # Deduplicate groups
-        seen = set()
-        deduped = []
-        for x in groups:
-            if x not in seen:
-                seen.add(x)
-                deduped.append(x)
-        node["groups"] = deduped or None
-    else:
-        node["groups"] = groups or None
-
-
-def convert(data):
-    if not isinstance(data, dict):
-        raise SystemExit("Top-level document must be a mapping/dict containing 'nodes'.")
-    nodes = data.get("nodes")
-    if not isinstance(nodes, list):
-        raise SystemExit("Input must contain a top-level 'nodes' array.")
-
-    # Aggregate unique BMCs. Key primarily by xname; fall back to (mac, ip, fqdn) tuple.
-    bmcs_by_key = {}
-    node_records = []
+    # Deduplicate groups, preserving order. The same few group names recur
+    # across every node, so intern them to share one string object per name.
+    node["groups"] = [_intern(x) for x in dict.fromkeys(groups)] or None
+
+
+def _bmc_output(rec):
+    """Return a copy of a BMC record with its fields in output order."""
+    out = {}
+    if "xname" in rec:
+        out["xname"] = rec["xname"]
+    if "mac" in rec:
+        out["mac"] = rec["mac"]
+    if "ip" in rec:
+        out["ip"] = rec["ip"]
+    if "fqdn" in rec:
+        out["fqdn"] = rec["fqdn"]
+    return out
+
+
+def _merge_triplet_bmcs(bmcs_by_xname, bmcs_by_triplet, triplet_nodes):
+    """Fold (mac, ip, fqdn)-keyed BMC records into the xname-keyed record that
+    shares their fqdn, mac, or ip. Merged records are removed from
+    bmcs_by_triplet.
+
+    Matching only uses the fields the xname-keyed records had before any
+    merge, so the result does not depend on the order of the input nodes.
+
+    triplet_nodes maps each triplet key to the positions of the nodes that
+    referenced it. Returns a mapping of those node positions to the BMC xname
+    they should now reference.
+    """
+    bmc_patches = {}
+    # One index per field, matched in this order of preference. Only string
+    # values are indexed: fields are passed through from the input as-is and
+    # may hold unhashable values such as lists.
+    indexes = {"fqdn": {}, "mac": {}, "ip": {}}
+    for rec in bmcs_by_xname.values():
+        for fld, index in indexes.items():
+            val = rec.get(fld)
+            if isinstance(val, str):
+                index.setdefault(val, rec)
+
+    for key, rec in list(bmcs_by_triplet.items()):
+        target = None
+        for fld, index in indexes.items():
+            if fld in rec:
+                target = index.get(rec[fld])
+                if target is not None:
+                    break
+        if target is None:
+            continue
+        for fld in indexes:
+            if fld in rec and fld not in target:
+                target[fld] = rec[fld]
+        del bmcs_by_triplet[key]
+        for pos in triplet_nodes.get(key, ()):
+            bmc_patches[pos] = target["xname"]
+
+    return bmc_patches
+
+
+def _convert_nodes(nodes, emit, copy_nodes=False):
+    """Convert an iterable of old-format nodes.
+
+    Each node dict is converted and passed to emit() in input order; other
+    items are skipped. Nodes are converted in place unless copy_nodes is set,
+    which is required when node dicts may be shared with other parts of the
+    document (YAML aliases); a shallow copy of each node is converted then.
+    Returns (bmcs_list, bmc_patches) where bmcs_list
+    is the sorted 'bmcs' array and bmc_patches maps the position of an emitted
+    node to the BMC xname it must reference. Such nodes could only be resolved
+    after all nodes were seen, so their 'bmc' is not yet set when emitted.
+    """
+    # Aggregate unique BMCs. Key primarily by xname; fall back to (mac, ip, fqdn)
+    # tuple. The two key spaces are disjoint, so keep them in separate dicts.
+    bmcs_by_xname = {}
+    bmcs_by_triplet = {}
+    # Positions of nodes whose BMC is only known by (mac, ip, fqdn), by triplet key
+    triplet_nodes = {}
+    pos = 0
+
+    # Bind globals, builtins and bound methods used per node to locals so the
+    # loop below uses fast local lookups.
+    _isinstance = isinstance
+    _dict = dict
+    _normalize_groups = normalize_groups_inplace
+    _derive = _derive_bmc_xname
+    xname_setdefault = bmcs_by_xname.setdefault
+    triplet_setdefault = bmcs_by_triplet.setdefault
 
     for raw_node in nodes:
-        if not isinstance(raw_node, dict):
+        if not _isinstance(raw_node, _dict):
             continue
-        node = dict(raw_node)  # shallow copy
+        # JSON input is consumed destructively: the parsed document is
+        # discarded after conversion and JSON parsers never share objects, so
+        # mutate in place instead of copying.
+        node = _dict(raw_node) if copy_nodes else raw_node
         # Extract BMC fields from the node
-        bmc_vals = {fld: node.pop(fld, None) for fld in BMC_FIELDS}
+        bmc_mac = node.pop("bmc_mac", None)
+        bmc_ip = node.pop("bmc_ip", None)
+        bmc_fqdn = node.pop("bmc_fqdn", None)
+        bmc_xname_in = node.pop("bmc_xname", None)
         # Normalize groups
-        normalize_groups_inplace(node)
+        _normalize_groups(node)
 
         # Determine BMC xname
-        bmc_xname = _derive_bmc_xname(node.get("xname"), bmc_vals.get("bmc_fqdn"), bmc_vals.get("bmc_xname"))
+        bmc_xname = _derive(node.get("xname"), bmc_fqdn, bmc_xname_in)
 
         # If any BMC info is present, create/merge a BMC record and add node['bmc']
-        has_any_bmc_info = any(v for v in bmc_vals.values())
-        if has_any_bmc_info or bmc_xname:
+        if bmc_xname or bmc_mac or bmc_ip or bmc_fqdn:
             if bmc_xname:
-                key = ("xname", bmc_xname)
+                rec = xname_setdefault(bmc_xname, {})
             else:
-                key = ("triplet", bmc_vals.get("bmc_mac"), bmc_vals.get("bmc_ip"), bmc_vals.get("bmc_fqdn"))
-            rec = bmcs_by_key.get(key, {})
-            # Merge what we know
-            if bmc_xname and not rec.get("xname"):
-                rec["xname"] = bmc_xname
-            if bmc_vals.get("bmc_mac") and not rec.get("mac"):
-                rec["mac"] = bmc_vals["bmc_mac"]
-            if bmc_vals.get("bmc_ip") and not rec.get("ip"):
-                rec["ip"] = bmc_vals["bmc_ip"]
-            if bmc_vals.get("bmc_fqdn") and not rec.get("fqdn"):
-                rec["fqdn"] = bmc_vals["bmc_fqdn"]
-            bmcs_by_key[key] = rec
+                key = (bmc_mac, bmc_ip, bmc_fqdn)
+                rec = triplet_setdefault(key, {})
+                triplet_nodes.setdefault(key, []).append(pos)
+            # Merge what we know; fields are only ever set to truthy values,
+            # so setdefault keeps the first one seen.
+            if bmc_xname:
+                rec.setdefault("xname", bmc_xname)
+            if bmc_mac:
+                rec.setdefault("mac", bmc_mac)
+            if bmc_ip:
+                rec.setdefault("ip", bmc_ip)
+            if bmc_fqdn:
+                rec.setdefault("fqdn", bmc_fqdn)
 
             # Only set node['bmc'] when we know the BMC xname (target format requirement)
             if bmc_xname:
                 node["bmc"] = bmc_xname
 
-        node_records.append(node)
-
-    # Build stable bmcs list. Assign deterministic 'name' fields (bmc1, bmc2, ...), though mapping uses xname.
-    def sort_key(item):
-        key, rec = item
-        if "xname" in rec and rec["xname"]:
-            return ("0", rec["xname"])
-        return ("1", rec.get("ip") or "", rec.get("mac") or "", rec.get("fqdn") or "")
-
-    bmcs_list = []
-    for idx, (_, rec) in enumerate(sorted(bmcs_by_key.items(), key=sort_key), start=1):
-        out = {}
-        if rec.get("xname") is not None:
-            out["xname"] = rec["xname"]
-        if rec.get("mac") is not None:
-            out["mac"] = rec["mac"]
-        if rec.get("ip") is not None:
-            out["ip"] = rec["ip"]
-        if rec.get("fqdn") is not None:
-            out["fqdn"] = rec["fqdn"]
-        bmcs_list.append(out)
+        emit(node)
+        pos += 1
+
+    # A BMC may be referenced by xname from some nodes but only by its
+    # mac/ip/fqdn from others; collapse those into a single record.
+    bmc_patches = {}
+    if bmcs_by_xname and bmcs_by_triplet:
+        bmc_patches = _merge_triplet_bmcs(bmcs_by_xname, bmcs_by_triplet, triplet_nodes)
+
+    # Build stable bmcs list: xname-keyed BMCs first, ordered by xname, followed
+    # by the rest ordered by (ip, mac, fqdn). Output records are built in the
+    # same pass that computes their sort key. Sort keys are single strings so
+    # the sort compares str objects directly; joining the triplet fields with
+    # NUL orders the same as comparing them as a tuple.
+    by_sort_key = itemgetter(0)
+    xname_bmcs = [(xname, _bmc_output(rec)) for xname, rec in bmcs_by_xname.items()]
+    xname_bmcs.sort(key=by_sort_key)
+    triplet_bmcs = [
+        (f"{ip or ''}\0{mac or ''}\0{fqdn or ''}", _bmc_output(rec))
+        for (mac, ip, fqdn), rec in bmcs_by_triplet.items()
+    ]
+    triplet_bmcs.sort(key=by_sort_key)
+
+    bmcs_list = [out for _, out in xname_bmcs]
+    bmcs_list.extend(out for _, out in triplet_bmcs)
+
+    return bmcs_list, bmc_patches
+
+
+def convert(data, copy_nodes=True):
+    """Convert a parsed old-format document. Pass copy_nodes=False only for
+    documents where no object is referenced twice (e.g. parsed JSON); their
+    nodes are then converted in place.
+    """
+    if not isinstance(data, dict):
+        raise SystemExit(ERR_TOP_LEVEL_NOT_MAPPING)
+    nodes = data.get("nodes")
+    if not isinstance(nodes, list):
+        raise SystemExit(ERR_NO_NODES_ARRAY)
+
+    node_records = []
+    bmcs_list, bmc_patches = _convert_nodes(nodes, node_records.append, copy_nodes)
+    for pos, bmc_xname in bmc_patches.items():
+        node_records[pos]["bmc"] = bmc_xname
 
     out_doc = {}
     out_doc["bmcs"] = bmcs_list
@@ -231,27 +427,220 @@ def convert(data):
     return out_doc
 
 
-def write_output(fmt, obj):
-    if fmt == "json":
-        json.dump(obj, sys.stdout, ensure_ascii=False, indent=2)
-        sys.stdout.write("\n")
+# Stdlib encoder settings for the indented (False) and compact (True) JSON
+# layouts. Node values are the parsed input objects, and recursive YAML anchors
+# can make them cyclic. A cyclic tree fails to encode either way (ValueError
+# with the circular reference check, RecursionError without it), so the check
+# only adds per-container bookkeeping and is skipped.
+_JSON_KWARGS = {
+    False: {"ensure_ascii": False, "check_circular": False, "indent": 2},
+    True: {"ensure_ascii": False, "check_circular": False, "separators": (",", ":")},
+}
+
+
+def _orjson_dumps(obj, compact, default=None):
+    """Return obj encoded by orjson as bytes, or None if orjson cannot encode
+    it (e.g. integers outside the 64-bit range).
+
+    Only for values orjson can write unchanged: it writes non-finite floats as
+    null, so callers must not pass documents that can hold them. orjson always
+    emits UTF-8 and, when indenting, uses 2 spaces, matching the stdlib layout.
+    Floats have the same value but not always the same spelling as with the
+    stdlib encoder: exponents have no '+' or zero padding (1.5e16, 1e-7 rather
+    than 1.5e+16, 1e-07), and some small numbers are written positionally
+    (0.00001 rather than 1e-05).
+    """
+    try:
+        return orjson.dumps(obj, default=default, option=0 if compact else orjson.OPT_INDENT_2)
+    except orjson.JSONEncodeError:
+        return None
+
+
+def _decimal_to_float(obj):
+    """JSON encoder 'default' hook for values parsed by ijson, which returns
+    non-integer numbers as Decimal. They are written as the float the stdlib
+    parser would have produced; other unknown types are still rejected.
+    """
+    from decimal import Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _decimal_to_finite_float(obj):
+    """Like _decimal_to_float(), but rejects values that overflow to infinity,
+    which orjson would write as null; the stdlib encoder then handles them.
+    """
+    value = _decimal_to_float(obj)
+    if value in (float("inf"), float("-inf")):
+        raise TypeError("non-finite float")
+    return value
+
+
+def _dumps_json(obj, compact=False, use_orjson=False):
+    """Serialize obj, as parsed by ijson, to a JSON string laid out the same
+    way as _write_json().
+    """
+    if use_orjson:
+        encoded = _orjson_dumps(obj, compact, default=_decimal_to_finite_float)
+        if encoded is not None:
+            return encoded.decode()
+    return json.dumps(obj, default=_decimal_to_float, **_JSON_KWARGS[compact])
+
+
+def _write_json(obj, compact=False, use_orjson=False):
+    """Write obj as JSON to STDOUT, followed by a newline, without holding
+    more than one encoded copy of the document in memory.
+    """
+    if use_orjson:
+        encoded = _orjson_dumps(obj, compact)
+        if encoded is not None:
+            # Write the bytes directly rather than decoding them into a second copy
+            sys.stdout.flush()
+            sys.stdout.buffer.write(encoded)
+            sys.stdout.buffer.write(b"\n")
+            return
+    if compact:
+        # Only dumps() without indentation runs the one-shot C encoder
+        sys.stdout.write(json.dumps(obj, **_JSON_KWARGS[True]))
     else:
-        if not HAVE_YAML:
-            sys.stderr.write("YAML output requested but PyYAML not available.\n")
+        # The indenting encoder is pure Python either way; dump() writes its
+        # chunks as they are produced instead of joining them first.
+        json.dump(obj, sys.stdout, **_JSON_KWARGS[False])
+    sys.stdout.write("\n")
+
+
+def _check_document_shape(events):
+    """Pass ijson parse events through, exiting with the same errors as
+    convert() if the top level is not a mapping or has no 'nodes' array.
+    """
+    events = iter(events)
+    first = next(events, None)
+    if first is None or first[1] != "start_map":
+        raise SystemExit(ERR_TOP_LEVEL_NOT_MAPPING)
+    yield first
+
+    have_nodes = False
+    expect_array = False
+    for prefix, event, value in events:
+        if expect_array:
+            if event != "start_array":
+                raise SystemExit(ERR_NO_NODES_ARRAY)
+            expect_array = False
+            have_nodes = True
+        elif event == "map_key" and prefix == "" and value == "nodes":
+            expect_array = True
+        yield prefix, event, value
+    if not have_nodes:
+        raise SystemExit(ERR_NO_NODES_ARRAY)
+
+
+def convert_streaming_json(stream, compact=False):
+    """Convert a JSON document read incrementally from a binary stream and
+    write the result as JSON to STDOUT.
+
+    Only the input node being converted is held in memory, plus the BMCs.
+    Converted nodes are spooled to a temporary file until all BMCs are known,
+    since 'bmcs' precedes 'nodes' in the output.
+    """
+    import ijson
+    import tempfile
+
+    # ijson rejects NaN and Infinity literals. Numbers that orjson cannot
+    # write unchanged (integers outside 64 bits, floats that overflow) make
+    # _dumps_json() fall back to the stdlib encoder.
+    use_orjson = HAVE_ORJSON
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+", encoding="utf-8") as spool:
+        def spool_node(node):
+            spool.write(_dumps_json(node, compact=True, use_orjson=use_orjson))
+            spool.write("\n")
+
+        try:
+            # Without use_float, ijson's C backend accepts integers of any size
+            # (yielding int) and returns other numbers as Decimal, which
+            # _dumps_json() writes as floats.
+            events = _check_document_shape(ijson.parse(stream))
+            nodes = ijson.items(events, "nodes.item")
+            bmcs_list, bmc_patches = _convert_nodes(nodes, spool_node)
+        except ijson.JSONError as e:
+            # Some ijson backends report errors as bytes
+            msg = e.args[0] if e.args else e
+            if isinstance(msg, bytes):
+                msg = msg.decode("utf-8", "replace")
+            sys.stderr.write(f"Failed to parse input as JSON: {msg}\n")
             sys.exit(2)
-        yaml.safe_dump(obj, sys.stdout, sort_keys=False, indent=2, default_flow_style=False)
+        spool.seek(0)
+
+        # Lay out the document the same way write_output() would
+        out = sys.stdout
+        if compact:
+            out.write('{"bmcs":')
+            out.write(_dumps_json(bmcs_list, compact=True, use_orjson=use_orjson))
+            out.write(',"nodes":[')
+            for pos, line in enumerate(spool):
+                if pos:
+                    out.write(",")
+                if pos in bmc_patches:
+                    node, by_orjson = _loads_json(line)
+                    node["bmc"] = bmc_patches[pos]
+                    out.write(_dumps_json(node, compact=True, use_orjson=by_orjson))
+                else:
+                    out.write(line[:-1])
+            out.write("]}\n")
+        else:
+            out.write('{\n  "bmcs": ')
+            out.write(_dumps_json(bmcs_list, use_orjson=use_orjson).replace("\n", "\n  "))
+            out.write(',\n  "nodes": [')
+            pos = -1
+            for pos, line in enumerate(spool):
+                # A line re-parsed by the stdlib parser may hold non-finite
+                # floats, which only the stdlib encoder writes unchanged.
+                node, by_orjson = _loads_json(line)
+                if pos in bmc_patches:
+                    node["bmc"] = bmc_patches[pos]
+                out.write(",\n    " if pos else "\n    ")
+                out.write(_dumps_json(node, use_orjson=by_orjson).replace("\n", "\n    "))
+            out.write("\n  ]\n}\n" if pos >= 0 else "]\n}\n")
+
+
+def write_output(fmt, obj, compact=False, use_orjson=False):
+    if fmt == "json":
+        # use_orjson is only set for documents orjson parsed itself, which
+        # cannot hold non-finite floats.
+        _write_json(obj, compact=compact, use_orjson=use_orjson)
+    else:
+        yaml, _, dumper = _import_yaml("YAML output requested but PyYAML not available.\n")
+        yaml.dump(obj, sys.stdout, Dumper=dumper, sort_keys=False, indent=2, default_flow_style=False)
+
+
+def _check_compact(args, out_fmt):
+    if args.compact and out_fmt == "yaml":
+        sys.stderr.write("--compact only applies to JSON output.\n")
+        sys.exit(2)
 
 
 def main():
     args = parse_args()
-    in_fmt, data = read_input(args.in_format)
-    converted = convert(data)
+    _check_compact(args, args.out_format)
+    if args.streaming_json:
+        if args.in_format == "yaml" or args.out_format == "yaml":
+            sys.stderr.write("--streaming-json only supports JSON input and output.\n")
+            sys.exit(2)
+        if not HAVE_IJSON:
+            sys.stderr.write("--streaming-json requested but ijson is not installed.\n")
+            sys.exit(2)
+        convert_streaming_json(sys.stdin.buffer, compact=args.compact)
+        return
 
-    out_fmt = args.out_format
-    if out_fmt == "match":
-        out_fmt = in_fmt
+    in_fmt, data, by_orjson = read_input(args.in_format)
+    out_fmt = in_fmt if args.out_format == "match" else args.out_format
+    _check_compact(args, out_fmt)
 
-    write_output(out_fmt, converted)
+    # YAML anchors/aliases can share node dicts with the rest of the document,
+    # so only JSON input is safe to convert in place.
+    converted = convert(data, copy_nodes=(in_fmt != "json"))
+    write_output(out_fmt, converted, compact=args.compact, use_orjson=by_orjson)
 
 
 if __name__ == "__main__":